@@ -47,3 +47,23 @@ select* from Food_Listings_Dataset
 ALTER TABLE Providers
 ALTER COLUMN Contact VARCHAR(50);
 
+
+-- Indexes on the join, filter and group keys used by the app's queries; safe to re-run
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_claims_food' AND object_id = OBJECT_ID('Claims'))
+    CREATE INDEX ix_claims_food ON Claims(Food_ID) INCLUDE (Status, Receiver_Id);
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_claims_status' AND object_id = OBJECT_ID('Claims'))
+    CREATE INDEX ix_claims_status ON Claims(Status) INCLUDE (Food_ID, Receiver_Id);
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_claims_receiver' AND object_id = OBJECT_ID('Claims'))
+    CREATE INDEX ix_claims_receiver ON Claims(Receiver_Id);
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_fl_food' AND object_id = OBJECT_ID('Food_Listings_Dataset'))
+    CREATE INDEX ix_fl_food ON Food_Listings_Dataset(Food_ID) INCLUDE (Food_Name, Quantity, Provider_ID, Meal_Type);
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_fl_provider' AND object_id = OBJECT_ID('Food_Listings_Dataset'))
+    CREATE INDEX ix_fl_provider ON Food_Listings_Dataset(Provider_ID) INCLUDE (Food_ID, Quantity, Food_Type, Meal_Type);
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_fl_food_type' AND object_id = OBJECT_ID('Food_Listings_Dataset'))
+    CREATE INDEX ix_fl_food_type ON Food_Listings_Dataset(Food_Type);
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_providers_id' AND object_id = OBJECT_ID('Providers'))
+    CREATE INDEX ix_providers_id ON Providers(Provider_ID) INCLUDE (Name, Type, City);
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_providers_city' AND object_id = OBJECT_ID('Providers'))
+    CREATE INDEX ix_providers_city ON Providers(City);
+IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'ix_receivers_id' AND object_id = OBJECT_ID('Receivers'))
+    CREATE INDEX ix_receivers_id ON Receivers(Receiver_ID) INCLUDE (Name, City);
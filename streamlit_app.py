@@ -6,10 +6,36 @@ import plotly.express as px
 import plotly.graph_objects as go
 from datetime import datetime
 import numpy as np
+import polars as pl
+import pyarrow as pa
+import hashlib
 import os
+import re
 import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from queue import Queue
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 from dotenv import load_dotenv
+
+try:
+    # Optional: fetch result sets as Arrow batches instead of Python objects per cell
+    import arrow_odbc
+except ImportError:
+    arrow_odbc = None
+else:
+    # Let the ODBC driver manager reuse connections opened by arrow-odbc
+    arrow_odbc.enable_odbc_connection_pooling()
+
+try:
+    # Optional: run the analytics queries in-process over table snapshots
+    import duckdb
+except ImportError:
+    duckdb = None
+
 # Page configuration
 st.set_page_config(
     page_title="Food Wastage Management System",
@@ -46,49 +72,122 @@ DB_CONFIG = {
     }
 }
 
-@st.cache_resource
-def init_connection(env="local"):
-    """Initialize connection to SQL Server"""
+def build_conn_str(env="local"):
+    """Build the ODBC connection string for the selected environment"""
 
     config = DB_CONFIG[env]  # Pick 'local' or 'cloud'
 
-    try:
-        if 'uid' in config and 'pwd' in config:
-            # SQL Authentication (Cloud)
-            conn_str = (
-                f"DRIVER={{{config['driver']}}};"
-                f"SERVER={config['server']};"
-                f"DATABASE={config['database']};"
-                f"UID={config['uid']};"
-                f"PWD={config['pwd']};"
-                f"Encrypt={config.get('Encrypt','no')};"
-                f"TrustServerCertificate={config.get('TrustServerCertificate','yes')};"
-                f"Connection Timeout={config.get('Connection Timeout',30)};"
-            )
-        else:
-            # Windows Authentication (Local)
-            conn_str = (
-                f"DRIVER={{{config['driver']}}};"
-                f"SERVER={config['server']};"
-                f"DATABASE={config['database']};"
-                f"Trusted_Connection={config['trusted_connection']};"
-            )
+    if 'uid' in config and 'pwd' in config:
+        # SQL Authentication (Cloud)
+        return (
+            f"DRIVER={{{config['driver']}}};"
+            f"SERVER={config['server']};"
+            f"DATABASE={config['database']};"
+            f"UID={config['uid']};"
+            f"PWD={config['pwd']};"
+            f"Encrypt={config.get('Encrypt','no')};"
+            f"TrustServerCertificate={config.get('TrustServerCertificate','yes')};"
+            f"Connection Timeout={config.get('Connection Timeout',30)};"
+        )
+
+    # Windows Authentication (Local)
+    return (
+        f"DRIVER={{{config['driver']}}};"
+        f"SERVER={config['server']};"
+        f"DATABASE={config['database']};"
+        f"Trusted_Connection={config['trusted_connection']};"
+    )
+
+
+# Analytics engine: "sqlserver" (default) or "duckdb" over Parquet snapshots of each table
+ANALYTICS_ENGINE = os.getenv("ANALYTICS_ENGINE", "sqlserver")
+ANALYTICS_SNAPSHOT_DIR = os.getenv("ANALYTICS_SNAPSHOT_DIR", "snapshots")
+TABLES = ("Providers", "Receivers", "Food_Listings_Dataset", "Claims")
+
+
+# 🔹 Auto-detect environment (local vs cloud)
+host = socket.gethostname()
+DB_ENV = "cloud" if "streamlit" in host.lower() else "local"  # Streamlit Cloud hosts contain "streamlit"
 
-        conn = pyodbc.connect(conn_str)
-        return conn
+# Let the ODBC driver manager recycle connections that get replaced
+pyodbc.pooling = True
+
+# Number of connections shared by all sessions
+POOL_SIZE = 8
+
+# Pooled connections idle longer than this are probed with SELECT 1 before reuse
+IDLE_CHECK_SECONDS = 60
+
+@st.cache_resource
+def get_pool(env=DB_ENV):
+    """Initialize a pool of connections to SQL Server shared across sessions"""
+    conn_str = build_conn_str(env)
+    # Slots hold (connection, time returned), or None for a slot that connects on checkout
+    pool = Queue(maxsize=POOL_SIZE)
+
+    try:
+        for _ in range(POOL_SIZE):
+            # Reads run without an open transaction; writes opt back in per call
+            pool.put((pyodbc.connect(conn_str, autocommit=True), time.monotonic()))
+        return pool
 
     except Exception as e:
+        # Don't leak the connections opened before the failure
+        while not pool.empty():
+            pool.get()[0].close()
         st.error(f"Error connecting to database: {e}")
         return None
 
+def close_quietly(conn):
+    """Close a connection that may already be dead"""
+    try:
+        conn.close()
+    except pyodbc.Error:
+        pass
 
-# 🔹 Auto-detect environment (local vs cloud)
-host = socket.gethostname()
+@contextmanager
+def get_conn():
+    """Borrow a connection from the pool for the duration of the block"""
+    pool = get_pool()
+    if pool is None:
+        yield None
+        return
 
-if "streamlit" in host.lower():  # Running on Streamlit Cloud
-    conn = init_connection(env="cloud")
-else:
-    conn = init_connection(env="local")
+    slot = pool.get()
+    conn = None
+    if slot is not None:
+        conn, returned_at = slot
+        if time.monotonic() - returned_at > IDLE_CHECK_SECONDS:
+            try:
+                # Check an idle handle is still alive after a network blip or server restart
+                cursor = conn.cursor()
+                cursor.execute("SELECT 1").fetchone()
+                cursor.close()
+            except pyodbc.Error:
+                close_quietly(conn)
+                conn = None
+
+    if conn is None:
+        try:
+            conn = pyodbc.connect(build_conn_str(DB_ENV), autocommit=True)
+        except pyodbc.Error as e:
+            # Keep the pool at full size with an empty slot for a later checkout to fill
+            pool.put(None)
+            st.error(f"Error connecting to database: {e}")
+            yield None
+            return
+
+    try:
+        yield conn
+    except (pyodbc.Error, pd.errors.DatabaseError):
+        # The link itself may be what failed; let the next checkout reconnect.
+        # pd.read_sql re-raises driver errors as DatabaseError
+        close_quietly(conn)
+        conn = None
+        raise
+    finally:
+        # A connection the block closed (a write that found the link dead) leaves an empty slot
+        pool.put(None if conn is None or conn.closed else (conn, time.monotonic()))
 
 
 # Custom CSS
@@ -110,35 +209,514 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Helper functions
-@st.cache_data
+# Rows fetched per Arrow batch
+ARROW_BATCH_SIZE = 50_000
+
+# Rows fetched per chunk when reading whole tables through pyodbc
+CHUNK_SIZE = 10_000
+
+@st.cache_resource
+def get_arrow_slots():
+    """Cap the arrow-odbc connections open at once, across all sessions, at the pool size"""
+    return threading.BoundedSemaphore(POOL_SIZE)
+
+def read_arrow_results(query, params=None):
+    """Fetch every result set of a query as Arrow-backed DataFrames, or None on failure"""
+    # arrow-odbc opens its own connection (recycled by the driver manager's pooling), so
+    # reads take a slot rather than a pyodbc connection they would leave idle
+    with get_arrow_slots():
+        try:
+            reader = arrow_odbc.read_arrow_batches_from_odbc(
+                query=query,
+                connection_string=build_conn_str(DB_ENV),
+                batch_size=ARROW_BATCH_SIZE,
+                # arrow-odbc binds every parameter as VARCHAR
+                parameters=[None if p is None else str(p) for p in params] if params else None,
+            )
+            results = []
+            while True:
+                # Statements without a result set come back with an empty schema
+                if len(reader.schema):
+                    table = pa.Table.from_batches(reader, schema=reader.schema)
+                    results.append(table.to_pandas(types_mapper=pd.ArrowDtype))
+                if not reader.more_results(batch_size=ARROW_BATCH_SIZE):
+                    return results
+        except (arrow_odbc.Error, pa.ArrowException) as e:
+            st.error(f"Error querying database: {e}")
+            return None
+
+def read_arrow(query, params=None):
+    """Fetch a result set as Arrow batches into an Arrow-backed DataFrame"""
+    results = read_arrow_results(query, params)
+    return results[0] if results else pd.DataFrame()
+
+def concat_chunks(chunks):
+    """Join Arrow-backed DataFrame chunks, typing each column by the first chunk with a value in it"""
+    tables = [pa.Table.from_pandas(chunk, preserve_index=False) for chunk in chunks]
+    if not tables:
+        return pd.DataFrame()
+    # A column that is all NULL within a chunk gets a guessed type there, so take it from a chunk with data
+    schema = pa.schema([
+        next((table.schema.field(i) for table in tables if table.column(i).null_count < table.num_rows), field)
+        for i, field in enumerate(tables[0].schema)
+    ])
+    return pa.concat_tables([table.cast(schema) for table in tables]).to_pandas(types_mapper=pd.ArrowDtype)
+
+def run_query(query, params=None, chunksize=None):
+    """Run a SELECT against SQL Server and return the result as a DataFrame"""
+    if arrow_odbc:
+        return read_arrow(query, params)
+
+    with get_conn() as conn:
+        if conn:
+            if chunksize:
+                # Only one chunk of rows is held as Python tuples at a time; the result is still built in full
+                return concat_chunks(pd.read_sql(query, conn, params=params, chunksize=chunksize,
+                                                 dtype_backend='pyarrow'))
+            # Arrow-backed columns, like the arrow-odbc path: strings are not boxed as Python objects
+            return pd.read_sql(query, conn, params=params, dtype_backend='pyarrow')
+    return pd.DataFrame()
+
+@st.cache_data(ttl=600, max_entries=128, show_spinner=False)
 def load_data(query):
     """Load data from SQL Server"""
-    if conn:
-        return pd.read_sql(query, conn)
-    return pd.DataFrame()
+    return run_query(query)
+
+@st.cache_data(ttl=600, max_entries=64, show_spinner=False)
+def load_data_params(query, params):
+    """Load data from SQL Server using a parameterized query"""
+    return run_query(query, params)
+
+def run_batch(queries, params=None):
+    """Run several SELECT statements in a single round trip, one DataFrame per result set"""
+    # NOCOUNT stops row counts from showing up as extra result sets
+    batch = "SET NOCOUNT ON;\n" + "\n".join(query.strip() for query in queries)
+    if arrow_odbc:
+        results = read_arrow_results(batch, params)
+        return [pd.DataFrame() for _ in queries] if results is None else results
+
+    with get_conn() as conn:
+        if not conn:
+            return [pd.DataFrame() for _ in queries]
 
-def execute_query(query, params=None):
-    """Execute SQL query with optional parameters"""
-    if conn:
         cursor = conn.cursor()
         if params:
-            cursor.execute(query, params)
+            cursor.execute(batch, params)
         else:
-            cursor.execute(query)
-        conn.commit()
-        return True
-    return False
+            cursor.execute(batch)
+
+        results = []
+        while True:
+            if cursor.description:
+                columns = [column[0] for column in cursor.description]
+                results.append(pd.DataFrame.from_records(
+                    [tuple(row) for row in cursor.fetchall()], columns=columns, coerce_float=True
+                ).convert_dtypes(dtype_backend='pyarrow'))
+            if not cursor.nextset():
+                break
+        cursor.close()
+        return results
 
-# Load all tables with correct schema
-@st.cache_data
-def load_all_data():
-    """Load all tables into session state"""
-    providers = load_data("SELECT * FROM Providers")
-    receivers = load_data("SELECT * FROM Receivers")
-    food_listings = load_data("SELECT * FROM Food_Listings_Dataset")
-    claims = load_data("SELECT * FROM Claims")
+@st.cache_resource
+def get_duckdb():
+    """Open an in-process DuckDB database with a view over each table snapshot"""
+    con = duckdb.connect(":memory:")
+    for table in TABLES:
+        path = os.path.join(ANALYTICS_SNAPSHOT_DIR, f"{table}.parquet")
+        con.execute(f"CREATE VIEW {table} AS SELECT * FROM read_parquet('{path}')")
+    return con
+
+def to_duckdb_sql(query):
+    """Rewrite a T-SQL SELECT TOP N into DuckDB's trailing LIMIT N"""
+    match = re.search(r"SELECT\s+TOP\s+(\d+)", query, re.IGNORECASE)
+    if not match:
+        return query
+    query = query[:match.start()] + "SELECT" + query[match.end():]
+    return query.strip().rstrip(";") + f"\nLIMIT {match.group(1)};"
+
+def integer_sums(table):
+    """Cast DuckDB's DECIMAL(38,0) sums back to the 64-bit integers SQL Server returns"""
+    # DuckDB widens SUM over an integer column to HUGEINT, which reaches Arrow as a decimal
+    fields = [pa.field(field.name, pa.int64()) if pa.types.is_decimal(field.type) and field.type.scale == 0
+              else field for field in table.schema]
+    return table.cast(pa.schema(fields))
+
+def run_duckdb_batch(queries):
+    """Run the analytics queries against the DuckDB snapshots, one DataFrame each"""
+    # A cursor is DuckDB's per-thread handle onto the shared database
+    con = get_duckdb().cursor()
+    try:
+        return [integer_sums(con.execute(to_duckdb_sql(query)).to_arrow_table()).to_pandas(types_mapper=pd.ArrowDtype)
+                for query in queries]
+    finally:
+        con.close()
+
+def run_concurrent(queries):
+    """Run independent SELECTs at the same time, each on its own pooled connection"""
+    ctx = get_script_run_ctx()
+    # Leave at least one pooled connection free for CRUD writes and other sessions
+    workers = max(1, min(len(queries), POOL_SIZE - 1))
+    # Workers join the script run so st.error from a failed query still reaches the page
+    with ThreadPoolExecutor(max_workers=workers,
+                            initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx)) as executor:
+        return list(executor.map(run_query, queries))
+
+def run_analytics_batch(queries):
+    """Run analytics queries on the configured engine, one DataFrame each"""
+    if ANALYTICS_ENGINE == "duckdb" and duckdb:
+        try:
+            return run_duckdb_batch(queries)
+        except duckdb.Error as e:
+            # A missing or unreadable snapshot shouldn't take the page down; the server has the data
+            st.warning(f"DuckDB snapshots unavailable, querying SQL Server instead: {e}")
+    # Overlapped, the slowest query sets the wait rather than the sum of all of them
+    return run_concurrent(queries)
+
+class QueryFailed(Exception):
+    """A query in a cached load failed; its error is already on the page"""
+
+def check_results(frames):
+    """Raise QueryFailed if any result is the column-less frame a failed query returns"""
+    # Raising keeps the failure out of st.cache_data, so the next rerun tries again
+    if any(len(frame.columns) == 0 for frame in frames):
+        raise QueryFailed
+    return frames
+
+@st.cache_data(ttl=1800, max_entries=16, show_spinner=False)
+def load_batch(queries, params=None):
+    """Load the results of several SELECT statements sent as one batch"""
+    return check_results(run_batch(queries, params))
+
+@st.cache_data(ttl=3600, max_entries=32, show_spinner=False)
+def load_analytics_batch(queries, dtypes=None):
+    """Load several analytics queries in one round trip, keyed like the queries dict"""
+    results = dict(zip(queries, check_results(run_analytics_batch(tuple(queries.values())))))
+    # COUNT() is a 32-bit INT on SQL Server, so count columns downcast losslessly
+    for key, dtype in (dtypes or {}).items():
+        if not results[key].empty:
+            results[key] = results[key].astype(dtype)
+    return results
+
+# Narrow projections of the tables the claim-based EDA tabs join. Each derivation joins
+# only the tables its original query did, so IDs that repeat (nothing constrains them
+# unique) fan out exactly as they would on the server.
+CLAIM_TABLE_QUERIES = {
+    'claims': "SELECT Claim_ID, Food_ID, Receiver_ID, Status FROM Claims;",
+    'listings': "SELECT Food_ID, Meal_Type, Quantity, Provider_ID FROM Food_Listings_Dataset;",
+    'providers': "SELECT Provider_ID, Name AS Provider_Name FROM Providers;",
+    'receivers': "SELECT Receiver_ID, Name AS Receiver_Name FROM Receivers;",
+}
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_claim_tables():
+    """Load the tables behind the claim-based EDA tabs as Polars frames"""
+    frames = check_results(run_analytics_batch(tuple(CLAIM_TABLE_QUERIES.values())))
+    tables = {name: pl.from_pandas(frame) for name, frame in zip(CLAIM_TABLE_QUERIES, frames)}
+    # Group keys as integer codes rather than strings
+    for name, columns in (('claims', ['Status']), ('listings', ['Meal_Type']),
+                          ('providers', ['Provider_Name']), ('receivers', ['Receiver_Name'])):
+        tables[name] = tables[name].with_columns(pl.col(columns).cast(pl.Categorical))
+    return tables
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def load_claim_results():
+    """Derive the EDA results for queries 9 to 12 from the cached claim tables"""
+    tables = load_claim_tables()
+    claims = tables['claims']
+    
+    # Aggregated in Polars on its multi-threaded group-by; only the small results go back to pandas.
+    # Inner joins skip NULL keys, as the server's do.
+    completed = claims.filter(pl.col('Status') == 'Completed').join(tables['listings'], on='Food_ID')
     
-    return providers, receivers, food_listings, claims
+    # Query 9: providers with the most completed claims
+    result9 = (completed.join(tables['providers'], on='Provider_ID')
+               .group_by('Provider_Name')
+               .agg(pl.col('Claim_ID').count().cast(pl.Int32).alias('SuccessfulClaims'))
+               .sort('SuccessfulClaims', descending=True)
+               .head(10)
+               .rename({'Provider_Name': 'ProviderName'}))
+    
+    # Query 10: share of all claims in each status, from one value_counts pass over Claims alone
+    result10 = (claims['Status'].value_counts(sort=True, name='Count')
+                .with_columns(pl.col('Count').cast(pl.Int32),
+                              (pl.col('Count') * 100 / pl.col('Count').sum()).round(2).alias('Percentage')))
+    
+    # Query 11: average quantity per receiver over completed claims, truncated to an
+    # integer as SQL Server's AVG of an INT column is, so it agrees with the Queries page
+    result11 = (completed.join(tables['receivers'], on='Receiver_ID')
+                .group_by(['Receiver_ID', 'Receiver_Name'])
+                .agg(pl.col('Quantity').mean().cast(pl.Int32).alias('Avg_Quantity_Claimed'))
+                .sort('Avg_Quantity_Claimed', descending=True, nulls_last=True)
+                .head(15))
+    
+    # Query 12: completed claims per meal type
+    result12 = (completed.group_by('Meal_Type')
+                .agg(pl.len().cast(pl.Int32).alias('Claim_Count'))
+                .sort('Claim_Count', descending=True))
+    
+    return {9: result9.to_pandas(), 10: result10.to_pandas(), 11: result11.to_pandas(),
+            12: result12.to_pandas()}
+
+def clear_table_caches(table):
+    """Drop the cached reads of one table after a write to it; aggregates expire on their TTL"""
+    load_ids.clear(table)
+    load_table_indexed.clear(table)
+    load_data.clear(f"SELECT * FROM {table}")
+    load_data.clear(DASHBOARD_TOTALS_QUERY)
+    if table == "Providers":
+        load_providers.clear()
+    elif table == "Receivers":
+        load_receivers.clear()
+        load_claims_joined.clear()
+    elif table == "Food_Listings_Dataset":
+        load_data.clear(RECENT_LISTINGS_QUERY)
+        load_filtered_listings.clear()
+        count_filtered_listings.clear()
+        load_listings_page.clear()
+        distinct_values.clear()
+        load_claims_joined.clear()
+    elif table == "Claims":
+        load_claims_joined.clear()
+
+@contextmanager
+def write_transaction(conn):
+    """Run the block's statements on a pooled connection as one transaction"""
+    conn.autocommit = False
+    cursor = conn.cursor()
+    try:
+        yield cursor
+        conn.commit()
+    except pyodbc.Error:
+        try:
+            conn.rollback()
+        except pyodbc.Error:
+            # The link is gone, so there is nothing to roll back; report the write's own error
+            pass
+        raise
+    finally:
+        try:
+            cursor.close()
+            # Hand the connection back to the pool in autocommit mode
+            conn.autocommit = True
+        except pyodbc.Error:
+            # get_conn replaces a closed connection rather than pooling it
+            close_quietly(conn)
+
+def execute_query(table, query, params=None):
+    """Execute SQL query with optional parameters in its own transaction"""
+    try:
+        with get_conn() as conn:
+            if not conn:
+                return False
+            with write_transaction(conn) as cursor:
+                if params:
+                    cursor.execute(query, params)
+                else:
+                    cursor.execute(query)
+    except pyodbc.Error as e:
+        st.error(f"Error executing query: {e}")
+        return False
+    # Drop this table's cached reads so the next rerun sees the change
+    clear_table_caches(table)
+    return True
+
+def execute_many(table, query, rows):
+    """Execute a parameterized statement once per row, all in one transaction"""
+    try:
+        with get_conn() as conn:
+            if not conn:
+                return False
+            with write_transaction(conn) as cursor:
+                # Ship the parameter rows as one array instead of a round trip per row
+                cursor.fast_executemany = True
+                cursor.executemany(query, rows)
+    except pyodbc.Error as e:
+        st.error(f"Error executing query: {e}")
+        return False
+    clear_table_caches(table)
+    return True
+
+def to_categories(data, columns):
+    """Store low-cardinality text columns as pandas categories (integer codes)"""
+    for col in columns:
+        if col in data.columns:
+            data[col] = data[col].astype('category')
+    return data
+
+# Load each table on demand so pages only fetch what they display
+@st.cache_data(ttl=600, show_spinner=False)
+def load_providers():
+    """Load the Providers table"""
+    return to_categories(run_query("SELECT * FROM Providers", chunksize=CHUNK_SIZE), ['Type', 'City'])
+
+@st.cache_data(ttl=600, show_spinner=False)
+def load_receivers():
+    """Load the Receivers table"""
+    return to_categories(run_query("SELECT * FROM Receivers", chunksize=CHUNK_SIZE), ['Type', 'City'])
+
+# Options offered by the add/update forms
+PROVIDER_TYPES = ("Supermarket", "Grocery Store", "Restaurant", "Catering Service")
+RECEIVER_TYPES = ("Charity", "Food Bank", "Shelter", "Community Center")
+MEAL_TYPES = ("Breakfast", "Lunch", "Dinner", "Snack")
+PROVIDER_TYPE_INDEX = {type_: i for i, type_ in enumerate(PROVIDER_TYPES)}
+
+# Primary key column of each table editable from the CRUD page
+ID_COL = {
+    "Providers": "Provider_ID",
+    "Receivers": "Receiver_ID",
+    "Food_Listings_Dataset": "Food_ID",
+    "Claims": "Claim_ID",
+}
+
+@st.cache_data(ttl=120, max_entries=8, show_spinner=False)
+def load_ids(table):
+    """Load just the ID column of a table, for the CRUD record pickers"""
+    id_col = ID_COL[table]
+    ids = run_query(f"SELECT {id_col} FROM {table} ORDER BY {id_col}")
+    if ids.empty:
+        return []
+    return ids[id_col].tolist()
+
+@st.cache_data(ttl=120, max_entries=8, show_spinner=False)
+def load_table_indexed(table):
+    """Load a table indexed by its ID column, so the row being edited is a direct lookup"""
+    data = run_query(f"SELECT * FROM {table}", chunksize=CHUNK_SIZE)
+    if data.empty:
+        return data
+    data = data.set_index(ID_COL[table], drop=False)
+    # IDs aren't constrained unique; keep the first row like the old positional lookup did
+    return data[~data.index.duplicated()]
+
+@st.cache_data(ttl=600, show_spinner=False)
+def load_claims_joined():
+    """Load claims with their food item and receiver details, joined on the server"""
+    return run_query("""
+        SELECT
+            c.Claim_ID,
+            c.Food_ID,
+            c.Receiver_ID,
+            c.Status,
+            c.Timestamp,
+            f.Food_Name,
+            f.Location,
+            f.Food_Type,
+            r.Name AS Receiver_Name
+        FROM Claims c
+        LEFT JOIN Food_Listings_Dataset f ON c.Food_ID = f.Food_ID
+        LEFT JOIN Receivers r ON c.Receiver_ID = r.Receiver_ID
+    """)
+
+FOOD_LISTING_COLUMNS = "Food_ID, Food_Name, Quantity, Expiry_Date, Provider_ID, Provider_Type, Location, Food_Type, Meal_Type"
+
+# Dashboard reads: row counts and a few listings, so the page never needs the full tables
+DASHBOARD_TOTALS_QUERY = """
+    SELECT
+        (SELECT COUNT(*) FROM Providers) AS Providers,
+        (SELECT COUNT(*) FROM Receivers) AS Receivers,
+        (SELECT COUNT(*) FROM Food_Listings_Dataset) AS Listings,
+        (SELECT COUNT(*) FROM Claims) AS Claims
+"""
+RECENT_LISTINGS_QUERY = f"SELECT TOP 10 {FOOD_LISTING_COLUMNS} FROM Food_Listings_Dataset"
+
+def listing_filter(locations=(), food_types=(), provider_types=()):
+    """WHERE clause and parameters selecting the food listings that match the filters"""
+    conditions, params = [], []
+    for column, values in (("Location", locations), ("Food_Type", food_types), ("Provider_Type", provider_types)):
+        if values:
+            conditions.append(f"{column} IN ({', '.join('?' * len(values))})")
+            params.extend(values)
+    return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+@st.cache_data(ttl=300, max_entries=64)
+def load_filtered_listings(locations=(), food_types=(), provider_types=()):
+    """Load only the food listings matching the selected filters"""
+    where, params = listing_filter(locations, food_types, provider_types)
+    return run_query(f"SELECT {FOOD_LISTING_COLUMNS} FROM Food_Listings_Dataset{where}", params)
+
+@st.cache_data(ttl=300, max_entries=64, show_spinner=False)
+def count_filtered_listings(locations=(), food_types=()):
+    """Count the food listings matching the selected filters"""
+    where, params = listing_filter(locations, food_types)
+    result = run_query(f"SELECT COUNT(*) AS Listings FROM Food_Listings_Dataset{where}", params)
+    return 0 if result.empty else int(result['Listings'].iloc[0])
+
+@st.cache_data(ttl=300, max_entries=64)
+def load_listings_page(locations=(), food_types=(), page=1):
+    """Load one page of the food listings matching the selected filters"""
+    where, params = listing_filter(locations, food_types)
+    # Offsets are computed here, not user text, so they are inlined rather than bound
+    query = (f"SELECT {FOOD_LISTING_COLUMNS} FROM Food_Listings_Dataset{where} ORDER BY Food_ID "
+             f"OFFSET {(int(page) - 1) * PAGE_SIZE} ROWS FETCH NEXT {PAGE_SIZE} ROWS ONLY")
+    return run_query(query, params)
+
+@st.cache_data(ttl=600, max_entries=32)
+def distinct_values(col):
+    """Distinct values of a Food_Listings_Dataset column, used as filter options"""
+    values = load_data(f"SELECT DISTINCT {col} FROM Food_Listings_Dataset ORDER BY {col}")
+    if values.empty:
+        return []
+    return values[col].dropna().tolist()
+
+# Rows sent to the browser per page of a large table
+PAGE_SIZE = 500
+
+def choose_page(n_rows, key):
+    """Page picker for a table of n_rows rows; returns the selected page number"""
+    n_pages = max(1, -(-n_rows // PAGE_SIZE))
+    return st.number_input("Page", min_value=1, max_value=n_pages, value=1, key=key) if n_pages > 1 else 1
+
+def show_page(page_data, page, n_rows):
+    """Display one page of rows, captioned with its place in the whole table"""
+    # 32-bit IDs halve the bytes on the wire; nullable since the tables allow NULL IDs
+    id_cols = {col: 'Int32' for col in ('Food_ID', 'Provider_ID') if col in page_data.columns}
+    st.dataframe(page_data.astype(id_cols), width="stretch", hide_index=True)
+    if n_rows > PAGE_SIZE:
+        start = (page - 1) * PAGE_SIZE
+        st.caption(f"Showing rows {start + 1}-{start + len(page_data)} of {n_rows}")
+
+def show_paged_dataframe(data, key):
+    """Display one page of a DataFrame so only the visible rows are serialized"""
+    page = choose_page(len(data), key)
+    start = (page - 1) * PAGE_SIZE
+    show_page(data.iloc[start:start + PAGE_SIZE], page, len(data))
+
+def frame_key(data):
+    """Cache key for a DataFrame: its columns and a digest of its rows in order"""
+    row_hashes = pd.util.hash_pandas_object(data, index=True).to_numpy()
+    return tuple(data.columns), hashlib.sha1(row_hashes.tobytes()).hexdigest()
+
+# Rows of a query result drawn in the page; longer results are offered as a download
+RESULT_PREVIEW_ROWS = 50
+
+@st.cache_data(ttl=600, max_entries=32, show_spinner=False, hash_funcs={pd.DataFrame: frame_key})
+def to_parquet_bytes(data):
+    """Serialize a result to Parquet once, rather than on every rerun that shows its download"""
+    return data.to_parquet(index=False)
+
+def show_result(data, name):
+    """Show the first rows of a query result, with the full result as a Parquet download"""
+    st.dataframe(data.head(RESULT_PREVIEW_ROWS), width="stretch")
+    if len(data) > RESULT_PREVIEW_ROWS:
+        st.caption(f"Showing {RESULT_PREVIEW_ROWS} of {len(data)} rows")
+        st.download_button(
+            label="Download full result",
+            data=to_parquet_bytes(data),
+            file_name=f"{name}.parquet",
+            mime="application/vnd.apache.parquet"
+        )
+
+# Most bars drawn in one chart; high-cardinality results are capped to the top rows
+MAX_CHART_BARS = 30
+
+# A resource cache hands back the same figure without the pickle round trip st.cache_data
+# makes on every hit; the figures are never mutated after they are built
+@st.cache_resource(ttl=3600, max_entries=64, show_spinner=False, hash_funcs={pd.DataFrame: frame_key})
+def cached_figure(kind, data, **options):
+    """Build a Plotly Express figure once per result, so reruns skip the trace and layout work"""
+    fig = getattr(px, kind)(data, **options)
+    if kind == 'bar':
+        fig.update_traces(marker_line_width=0)
+    return fig
 
 # Main app
 def main():
@@ -151,73 +729,81 @@ def main():
         ["Dashboard", "Food Listings", "Providers", "Receivers", "Claims", "Analytics", "CRUD Operations","EDA Analysis" ,"Queries"]
     )
     
-    # Load data
-    providers, receivers, food_listings, claims = load_all_data()
-    
     if page == "Dashboard":
-        show_dashboard(providers, receivers, food_listings, claims)
+        show_dashboard()
     elif page == "Food Listings":
-        show_food_listings(food_listings, providers)
+        show_food_listings()
     elif page == "Providers":
-        show_providers(providers)
+        show_providers()
     elif page == "Receivers":
-        show_receivers(receivers)
+        show_receivers()
     elif page == "Claims":
-        show_claims(claims, food_listings, receivers)
+        show_claims()
     elif page == "Analytics":
-        show_analytics(providers, receivers, food_listings, claims)
+        show_analytics()
     elif page == "CRUD Operations":
         show_crud_operations()
     elif page == "EDA Analysis":
-        show_eda_analysis(providers, receivers, food_listings, claims)
+        show_eda_analysis()
     elif page == "Queries":
         show_queries()
 
-def show_dashboard(providers, receivers, food_listings, claims):
+def show_dashboard():
     """Display dashboard with key metrics"""
     st.header("📊 Dashboard Overview")
+    totals = load_data(DASHBOARD_TOTALS_QUERY)
+    if totals.empty:
+        st.warning("No data available")
+        return
+    totals = totals.iloc[0]
     
     col1, col2, col3, col4 = st.columns(4)
     
     with col1:
-        st.metric("Total Providers", len(providers))
+        st.metric("Total Providers", int(totals['Providers']))
     with col2:
-        st.metric("Total Receivers", len(receivers))
+        st.metric("Total Receivers", int(totals['Receivers']))
     with col3:
-        st.metric("Total Food Listings", len(food_listings))
+        st.metric("Total Food Listings", int(totals['Listings']))
     with col4:
-        st.metric("Total Claims", len(claims))
+        st.metric("Total Claims", int(totals['Claims']))
     
     # Recent activity
     st.subheader("Recent Activity")
     
-    if not food_listings.empty:
-        st.dataframe(food_listings.head(10))
+    if totals['Listings']:
+        st.dataframe(load_data(RECENT_LISTINGS_QUERY), width="stretch", hide_index=True)
     
     # Quick filters
     st.subheader("Quick Filters")
     col1, col2 = st.columns(2)
     
+    location_options = ["All"]
+    food_type_options = ["All"]
+    if totals['Listings']:
+        location_options += distinct_values('Location')
+        food_type_options += distinct_values('Food_Type')
+    
     with col1:
-        location_filter = st.selectbox("Filter by Location", ["All"] + food_listings['Location'].unique().tolist() if not food_listings.empty else ["All"])
+        location_filter = st.selectbox("Filter by Location", location_options)
     
     with col2:
-        food_type_filter = st.selectbox("Filter by Food Type", ["All"] + food_listings['Food_Type'].unique().tolist() if not food_listings.empty else ["All"])
-    
-    if not food_listings.empty:
-        filtered_listings = food_listings.copy()
-        if location_filter != "All":
-            filtered_listings = filtered_listings[filtered_listings['Location'] == location_filter]
-        if food_type_filter != "All":
-            filtered_listings = filtered_listings[filtered_listings['Food_Type'] == food_type_filter]
-        
-        st.dataframe(filtered_listings)
+        food_type_filter = st.selectbox("Filter by Food Type", food_type_options)
+    
+    if totals['Listings']:
+        # Filtered and paged on the server: only the rows on screen are fetched
+        locations = () if location_filter == "All" else (location_filter,)
+        food_types = () if food_type_filter == "All" else (food_type_filter,)
+        n_rows = count_filtered_listings(locations, food_types)
+        page = choose_page(n_rows, key="dashboard_page")
+        show_page(load_listings_page(locations, food_types, page), page, n_rows)
 
-def show_food_listings(food_listings, providers):
+def show_food_listings():
     """Display food listings with filtering"""
     st.header("🥘 Food Listings")
     
-    if food_listings.empty:
+    locations = distinct_values('Location')
+    if not locations:
         st.warning("No food listings available")
         return
     
@@ -225,22 +811,18 @@ def show_food_listings(food_listings, providers):
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        location_filter = st.multiselect("Location", food_listings['Location'].unique())
+        location_filter = st.multiselect("Location", locations)
     with col2:
-        food_type_filter = st.multiselect("Food Type", food_listings['Food_Type'].unique())
+        food_type_filter = st.multiselect("Food Type", distinct_values('Food_Type'))
     with col3:
-        provider_type_filter = st.multiselect("Provider Type", food_listings['Provider_Type'].unique())
-    
-    filtered_listings = food_listings.copy()
+        provider_type_filter = st.multiselect("Provider Type", distinct_values('Provider_Type'))
     
-    if location_filter:
-        filtered_listings = filtered_listings[filtered_listings['Location'].isin(location_filter)]
-    if food_type_filter:
-        filtered_listings = filtered_listings[filtered_listings['Food_Type'].isin(food_type_filter)]
-    if provider_type_filter:
-        filtered_listings = filtered_listings[filtered_listings['Provider_Type'].isin(provider_type_filter)]
+    # Filter on the server so only matching rows are fetched
+    filtered_listings = load_filtered_listings(
+        tuple(location_filter), tuple(food_type_filter), tuple(provider_type_filter)
+    )
     
-    st.dataframe(filtered_listings)
+    show_paged_dataframe(filtered_listings, key="food_listings_page")
     
     # Add new listing button
     if st.button("Add New Listing"):
@@ -253,10 +835,10 @@ def show_food_listings(food_listings, providers):
             quantity = st.number_input("Quantity", min_value=1)
             expiry_date = st.date_input("Expiry Date")
             provider_id = st.number_input("Provider ID", min_value=1)
-            provider_type = st.selectbox("Provider Type", ["Supermarket", "Grocery Store", "Restaurant", "Catering Service"])
+            provider_type = st.selectbox("Provider Type", PROVIDER_TYPES)
             location = st.text_input("Location")
             food_type = st.text_input("Food Type")
-            meal_type = st.selectbox("Meal Type", ["Breakfast", "Lunch", "Dinner", "Snack"])
+            meal_type = st.selectbox("Meal Type", MEAL_TYPES)
             
             submitted = st.form_submit_button("Add Listing")
             if submitted:
@@ -264,14 +846,15 @@ def show_food_listings(food_listings, providers):
                 INSERT INTO Food_Listings_Dataset (Food_Name, Quantity, Expiry_Date, Provider_ID, Provider_Type, Location, Food_Type, Meal_Type)
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?)
                 """
-                if execute_query(query, [food_name, quantity, expiry_date, provider_id, provider_type, location, food_type, meal_type]):
+                if execute_query("Food_Listings_Dataset", query, [food_name, quantity, expiry_date, provider_id, provider_type, location, food_type, meal_type]):
                     st.success("Listing added successfully!")
                     st.session_state.show_add_form = False
                     st.rerun()
 
-def show_providers(providers):
+def show_providers():
     """Display providers information"""
     st.header("🏢 Food Providers")
+    providers = load_providers()
     
     if providers.empty:
         st.warning("No providers available")
@@ -290,9 +873,10 @@ def show_providers(providers):
     """)
     st.dataframe(provider_counts)
 
-def show_receivers(receivers):
+def show_receivers():
     """Display receivers information"""
     st.header("👥 Food Receivers")
+    receivers = load_receivers()
     
     if receivers.empty:
         st.warning("No receivers available")
@@ -300,71 +884,37 @@ def show_receivers(receivers):
     
     st.dataframe(receivers)
 
-def show_claims(claims, food_listings, receivers):
+def show_claims():
     """Display claims information"""
     st.header("📋 Claims")
+    claims_with_details = load_claims_joined()
     
-    if claims.empty or food_listings.empty or receivers.empty:
+    if claims_with_details.empty:
         st.warning("No claims data available")
         return
     
-    try:
-        # Check available columns in claims
-        claims_cols = claims.columns.tolist()
-        receivers_cols = receivers.columns.tolist()
-        
-        # Build merge step by step
-        claims_with_details = claims.copy()
-        
-        # Merge with food listings
-        if 'Food_ID' in claims.columns and 'Food_ID' in food_listings.columns:
-            food_cols = ['Food_ID', 'Food_Name', 'Location', 'Food_Type']
-            available_food_cols = [col for col in food_cols if col in food_listings.columns]
-            if available_food_cols:
-                claims_with_details = claims_with_details.merge(
-                    food_listings[available_food_cols], 
-                    on='Food_ID', how='left'
-                )
-        
-        # Merge with receivers - handle different column names
-        receiver_key = None
-        if 'Receiver_ID' in claims.columns and 'Receiver_ID' in receivers.columns:
-            receiver_key = 'Receiver_ID'
-        elif 'ReceiverID' in claims.columns and 'ReceiverID' in receivers.columns:
-            receiver_key = 'ReceiverID'
-        elif 'ReceiverId' in claims.columns and 'ReceiverId' in receivers.columns:
-            receiver_key = 'ReceiverId'
-        
-        if receiver_key:
-            receiver_cols = [receiver_key, 'Name'] if 'Name' in receivers.columns else [receiver_key]
-            claims_with_details = claims_with_details.merge(
-                receivers[receiver_cols], 
-                on=receiver_key, how='left'
-            )
-        else:
-            # Try to find matching columns
-            for col in claims.columns:
-                if col in receivers.columns and col.endswith('_ID'):
-                    claims_with_details = claims_with_details.merge(
-                        receivers[['Name']] if 'Name' in receivers.columns else receivers,
-                        left_on=col,
-                        right_index=False,
-                        how='left'
-                    )
-                    break
-        
-        st.dataframe(claims_with_details)
-        
-    except Exception as e:
-        st.error(f"Error displaying claims: {str(e)}")
-        st.write("Raw claims data:")
-        st.dataframe(claims)
+    st.dataframe(claims_with_details)
 
-def show_analytics(providers, receivers, food_listings, claims):
+def show_analytics():
     """Display analytics and insights"""
     st.header("📈 Analytics & Insights")
+    # Aggregate on the server instead of shipping every listing to count it here
+    food_type_counts = load_data("""
+        SELECT Food_Type, COUNT(*) AS Listings
+        FROM Food_Listings_Dataset
+        WHERE Food_Type IS NOT NULL
+        GROUP BY Food_Type
+        ORDER BY Listings DESC
+    """)
+    location_counts = load_data("""
+        SELECT Location, COUNT(*) AS Listings
+        FROM Food_Listings_Dataset
+        WHERE Location IS NOT NULL
+        GROUP BY Location
+        ORDER BY Listings DESC
+    """)
     
-    if food_listings.empty:
+    if food_type_counts.empty:
         st.warning("No data available for analytics")
         return
     
@@ -373,15 +923,17 @@ def show_analytics(providers, receivers, food_listings, claims):
     
     with col1:
         st.subheader("Food Type Distribution")
-        food_type_counts = food_listings['Food_Type'].value_counts()
-        fig = px.pie(values=food_type_counts.values, names=food_type_counts.index)
-        st.plotly_chart(fig)
+        fig = cached_figure('pie', food_type_counts.astype({'Listings': 'int32'}), values='Listings', names='Food_Type')
+        st.plotly_chart(fig, width="stretch", theme=None)
     
     with col2:
         st.subheader("Location-wise Listings")
-        location_counts = food_listings['Location'].value_counts()
-        fig = px.bar(x=location_counts.index, y=location_counts.values)
-        st.plotly_chart(fig)
+        # Every location would be one bar shipped to the browser; chart only the busiest
+        top_locations = location_counts.nlargest(MAX_CHART_BARS, 'Listings')
+        fig = cached_figure('bar', top_locations.astype({'Listings': 'int32'}), x='Location', y='Listings')
+        st.plotly_chart(fig, width="stretch", theme=None)
+        if len(location_counts) > MAX_CHART_BARS:
+            st.caption(f"Top {MAX_CHART_BARS} of {len(location_counts)} locations")
     
     # Top providers
     st.subheader("Top Food Providers")
@@ -416,7 +968,7 @@ def show_crud_operations():
     """Display CRUD operations interface"""
     st.header("🔧 CRUD Operations")
     
-    operation = st.selectbox("Select Operation", ["Create", "Read", "Update", "Delete"])
+    operation = st.selectbox("Select Operation", ["Create", "Read", "Update", "Delete", "Bulk Upload"])
     table = st.selectbox("Select Table", ["Providers", "Receivers", "Food_Listings_Dataset", "Claims"])
     
     if operation == "Create":
@@ -427,6 +979,8 @@ def show_crud_operations():
         show_update_form(table)
     elif operation == "Delete":
         show_delete_form(table)
+    elif operation == "Bulk Upload":
+        show_bulk_upload_form(table)
 
 def show_create_form(table):
     """Show create form for selected table"""
@@ -435,7 +989,7 @@ def show_create_form(table):
     if table == "Providers":
         with st.form("add_provider"):
             name = st.text_input("Name")
-            type_ = st.selectbox("Type", ["Supermarket", "Grocery Store", "Restaurant", "Catering Service"])
+            type_ = st.selectbox("Type", PROVIDER_TYPES)
             address = st.text_input("Address")
             city = st.text_input("City")
             contact = st.text_input("Contact")
@@ -443,21 +997,21 @@ def show_create_form(table):
             submitted = st.form_submit_button("Add Provider")
             if submitted:
                 query = "INSERT INTO Providers (Name, Type, Address, City, Contact) VALUES (?, ?, ?, ?, ?)"
-                if execute_query(query, [name, type_, address, city, contact]):
+                if execute_query("Providers", query, [name, type_, address, city, contact]):
                     st.success("Provider added successfully!")
                     st.rerun()
     
     elif table == "Receivers":
         with st.form("add_receiver"):
             name = st.text_input("Name")
-            type_ = st.selectbox("Type", ["Charity", "Food Bank", "Shelter", "Community Center"])
+            type_ = st.selectbox("Type", RECEIVER_TYPES)
             city = st.text_input("City")
             contact = st.text_input("Contact")
             
             submitted = st.form_submit_button("Add Receiver")
             if submitted:
                 query = "INSERT INTO Receivers (Name, Type, City, Contact) VALUES (?, ?, ?, ?)"
-                if execute_query(query, [name, type_, city, contact]):
+                if execute_query("Receivers", query, [name, type_, city, contact]):
                     st.success("Receiver added successfully!")
                     st.rerun()
 
@@ -471,50 +1025,93 @@ def show_update_form(table):
     """Show update form for selected table"""
     st.subheader(f"Update {table}")
     
-    data = load_data(f"SELECT * FROM {table}")
-    if data.empty:
+    ids = load_ids(table)
+    if not ids:
         st.warning("No data available")
         return
     
-    if not data.empty:
-        id_col = f"{'Provider_ID' if table == 'Providers' else 'Receiver_ID' if table == 'Receivers' else 'Food_ID' if table == 'Food_Listings_Dataset' else 'Claim_ID'}"
-        selected_id = st.selectbox(f"Select ID to update", data[id_col].tolist())
-        
-        selected_row = data[data[id_col] == selected_id].iloc[0]
-        
-        with st.form("update_form"):
-            if table == "Providers":
-                name = st.text_input("Name", value=selected_row['Name'])
-                type_ = st.selectbox("Type", ["Supermarket", "Grocery Store", "Restaurant", "Catering Service"], 
-                                   index=["Supermarket", "Grocery Store", "Restaurant", "Catering Service"].index(selected_row['Type']))
-                address = st.text_input("Address", value=selected_row['Address'])
-                city = st.text_input("City", value=selected_row['City'])
-                contact = st.text_input("Contact", value=selected_row['Contact'])
-                
-                if st.form_submit_button("Update Provider"):
-                    query = "UPDATE Providers SET Name=?, Type=?, Address=?, City=?, Contact=? WHERE Provider_ID=?"
-                    if execute_query(query, [name, type_, address, city, contact, selected_id]):
-                        st.success("Provider updated successfully!")
-                        st.rerun()
+    selected_id = st.selectbox(f"Select ID to update", ids)
+    data = load_table_indexed(table)
+    # The ID list and the indexed rows are cached separately and can expire at different times
+    if selected_id not in data.index:
+        st.warning("Selected record no longer exists")
+        return
+    
+    selected_row = data.loc[selected_id]
+    
+    with st.form("update_form"):
+        if table == "Providers":
+            name = st.text_input("Name", value=selected_row['Name'])
+            type_ = st.selectbox("Type", PROVIDER_TYPES, index=PROVIDER_TYPE_INDEX.get(selected_row['Type'], 0))
+            address = st.text_input("Address", value=selected_row['Address'])
+            city = st.text_input("City", value=selected_row['City'])
+            contact = st.text_input("Contact", value=selected_row['Contact'])
+            
+            if st.form_submit_button("Update Provider"):
+                query = "UPDATE Providers SET Name=?, Type=?, Address=?, City=?, Contact=? WHERE Provider_ID=?"
+                if execute_query("Providers", query, [name, type_, address, city, contact, selected_id]):
+                    st.success("Provider updated successfully!")
+                    st.rerun()
 
 def show_delete_form(table):
     """Show delete form for selected table"""
     st.subheader(f"Delete from {table}")
     
-    data = load_data(f"SELECT * FROM {table}")
-    if data.empty:
+    ids = load_ids(table)
+    if not ids:
         st.warning("No data available")
         return
     
-    if not data.empty:
-        id_col = f"{'Provider_ID' if table == 'Providers' else 'Receiver_ID' if table == 'Receivers' else 'Food_ID' if table == 'Food_Listings_Dataset' else 'Claim_ID'}"
-        selected_id = st.selectbox(f"Select ID to delete", data[id_col].tolist())
-        
-        if st.button("Delete"):
-            query = f"DELETE FROM {table} WHERE {id_col}=?"
-            if execute_query(query, [selected_id]):
-                st.success(f"Record deleted successfully!")
-                st.rerun()
+    selected_id = st.selectbox(f"Select ID to delete", ids)
+    if selected_id is None:
+        st.warning("No record selected")
+        return
+    
+    if st.button("Delete"):
+        query = f"DELETE FROM {table} WHERE {ID_COL[table]}=?"
+        if execute_query(table, query, [selected_id]):
+            st.success(f"Record deleted successfully!")
+            st.rerun()
+
+def show_bulk_upload_form(table):
+    """Insert many rows into a table from an uploaded CSV file"""
+    st.subheader(f"Bulk Upload to {table}")
+    
+    if table != "Food_Listings_Dataset":
+        st.info("Bulk upload is currently available for Food_Listings_Dataset only")
+        return
+    
+    columns = [col.strip() for col in FOOD_LISTING_COLUMNS.split(",")]
+    uploaded_file = st.file_uploader(f"CSV file with columns: {FOOD_LISTING_COLUMNS}", type="csv")
+    if uploaded_file is None:
+        return
+    
+    try:
+        rows = pd.read_csv(uploaded_file)
+    except (ValueError, pd.errors.ParserError) as e:
+        st.error(f"Could not read the CSV file: {e}")
+        return
+    missing = [col for col in columns if col not in rows.columns]
+    if missing:
+        st.error(f"Missing columns: {', '.join(missing)}")
+        return
+    
+    expiry_dates = pd.to_datetime(rows['Expiry_Date'], format="mixed", errors="coerce")
+    bad_rows = rows.index[expiry_dates.isna() & rows['Expiry_Date'].notna()]
+    if len(bad_rows):
+        st.error(f"Invalid Expiry_Date in data rows: {', '.join(str(i + 1) for i in bad_rows[:20])}")
+        return
+    
+    rows = rows[columns].assign(Expiry_Date=expiry_dates.dt.date)
+    st.dataframe(rows.head(10))
+    
+    if st.button(f"Insert {len(rows)} rows"):
+        query = f"INSERT INTO Food_Listings_Dataset ({FOOD_LISTING_COLUMNS}) VALUES ({', '.join('?' * len(columns))})"
+        # Plain Python values with None for blanks, as pyodbc expects
+        params = rows.astype(object).where(rows.notna(), None).values.tolist()
+        if execute_many("Food_Listings_Dataset", query, params):
+            st.success(f"{len(rows)} listings added successfully!")
+            st.rerun()
 
 def show_queries():
     """Display all 13 queries with results"""
@@ -547,7 +1144,6 @@ def show_queries():
         """,
         
         "Query 3: What is the contact information of food providers in a specific city?": """
-            DECLARE @city_name VARCHAR(100) = 'Adambury';
             SELECT 
                 Name,
                 Type,
@@ -555,7 +1151,7 @@ def show_queries():
                 City,
                 Contact
             FROM Providers
-            WHERE City = @city_name
+            WHERE City = ?
             ORDER BY Name
             OFFSET 0 ROWS FETCH NEXT 5 ROWS ONLY;
         """,
@@ -598,23 +1194,33 @@ def show_queries():
         """,
         
         "Query 8: How many food claims have been made for each food item?": """
+            WITH c AS (
+                SELECT Food_ID, COUNT(Claim_ID) AS Claim_Total
+                FROM Claims
+                GROUP BY Food_ID
+            )
             SELECT 
                 fl.Food_Name,
-                COUNT(c.Claim_ID) AS TotalClaims
+                SUM(COALESCE(c.Claim_Total, 0)) AS TotalClaims
             FROM Food_Listings_Dataset fl
-            LEFT JOIN Claims c ON fl.Food_ID = c.Food_ID
+            LEFT JOIN c ON fl.Food_ID = c.Food_ID
             GROUP BY fl.Food_Name
             ORDER BY TotalClaims DESC;
         """,
         
         "Query 9: Which provider has had the highest number of successful food claims?": """
+            WITH c AS (
+                SELECT Food_ID, COUNT(Claim_ID) AS Claim_Total
+                FROM Claims
+                WHERE Status = 'Completed'
+                GROUP BY Food_ID
+            )
             SELECT TOP 1
                 p.Name AS ProviderName,
-                COUNT(c.Claim_ID) AS SuccessfulClaims
+                SUM(c.Claim_Total) AS SuccessfulClaims
             FROM Providers p
             JOIN Food_Listings_Dataset fl ON p.Provider_ID = fl.Provider_ID
-            JOIN Claims c ON fl.Food_ID = c.Food_ID
-            WHERE c.Status = 'Completed'
+            JOIN c ON fl.Food_ID = c.Food_ID
             GROUP BY p.Name
             ORDER BY SuccessfulClaims DESC;
         """,
@@ -623,7 +1229,7 @@ def show_queries():
             SELECT 
                 Status,
                 COUNT(*) AS Count,
-                ROUND((COUNT(*) * 100.0 / (SELECT COUNT(*) FROM Claims)), 2) AS Percentage
+                ROUND(COUNT(*) * 100.0 / SUM(COUNT(*)) OVER (), 2) AS Percentage
             FROM Claims
             GROUP BY Status;
         """,
@@ -643,23 +1249,33 @@ def show_queries():
         """,
         
         "Query 12: Meal type claimed the most": """
+            WITH c AS (
+                SELECT Food_ID, COUNT(*) AS Claim_Total
+                FROM Claims
+                WHERE Status = 'Completed'
+                GROUP BY Food_ID
+            )
             SELECT TOP 1
                 f.Meal_Type,
-                COUNT(*) AS Claim_Count
-            FROM Claims c
+                SUM(c.Claim_Total) AS Claim_Count
+            FROM c
             JOIN Food_Listings_Dataset f
                 ON c.Food_ID = f.Food_ID
-            WHERE c.Status = 'Completed'
             GROUP BY f.Meal_Type
             ORDER BY Claim_Count DESC;
         """,
         
         "Query 13: Total quantity of food donated by each provider": """
+            WITH f AS (
+                SELECT Provider_ID, SUM(Quantity) AS Quantity
+                FROM Food_Listings_Dataset
+                GROUP BY Provider_ID
+            )
             SELECT 
                 p.Provider_ID,
                 p.Name AS Provider_Name,
                 SUM(f.Quantity) AS Total_Quantity_Donated
-            FROM Food_Listings_Dataset f
+            FROM f
             JOIN Providers p
                 ON f.Provider_ID = p.Provider_ID
             GROUP BY p.Provider_ID, p.Name
@@ -667,33 +1283,75 @@ def show_queries():
         """
     }
     
-    for query_name, query in queries.items():
+    # All 13 queries go to the server as one batch; Query 3 takes the city as its only parameter
+    try:
+        results = load_batch(tuple(queries.values()), ("Adambury",))
+    except QueryFailed:
+        return
+    
+    for (query_name, query), result in zip(queries.items(), results):
         with st.expander(query_name):
             st.code(query, language="sql")
-            result = load_data(query)
             if not result.empty:
-                st.dataframe(result)
+                show_result(result, query_name.split(":")[0].lower().replace(" ", "_"))
                 
                 # Visualize if appropriate
                 if len(result.columns) >= 2 and len(result) > 1:
                     if 'Total' in str(result.columns[-1]) or 'Count' in str(result.columns[-1]):
-                        fig = px.bar(result, x=result.columns[0], y=result.columns[-1])
-                        st.plotly_chart(fig)
+                        top = result.nlargest(MAX_CHART_BARS, result.columns[-1])
+                        fig = cached_figure('bar', top, x=result.columns[0], y=result.columns[-1])
+                        st.plotly_chart(fig, width="stretch", theme=None)
+
+# Each EDA query's tab label, heading and chart: (Plotly Express kind, options), or None
+EDA_TABS = {
+    1: ("City Distribution", f"Query 1: Food Providers and Receivers by City (Top {MAX_CHART_BARS})",
+        ('bar', dict(x='City', y=['Total_Providers', 'Total_Receivers'], title="Providers vs Receivers by City"))),
+    2: ("Top Provider Types", "Query 2: Top Food Provider Types by Contribution",
+        ('pie', dict(values='Total_Quantity', names='Provider_Type', title="Food Contribution by Provider Type"))),
+    3: ("Contact Info", "Query 3: Contact Information of Food Providers", None),
+    4: ("Top Receivers", "Query 4: Top Receivers by Claims",
+        ('bar', dict(x='Receiver_Name', y='Total_Claims', title="Top Receivers by Number of Claims"))),
+    5: ("Total Food Available", "Query 5: Total Quantity of Food Available", None),
+    6: ("Top Cities", "Query 6: Cities with Highest Food Listings",
+        ('bar', dict(x='City', y='Total_Listings', title="Top Cities by Food Listings"))),
+    7: ("Food Types", "Query 7: Most Common Food Types",
+        ('pie', dict(values='Listings_Count', names='Food_Type', title="Distribution of Food Types"))),
+    8: ("Food Claims", "Query 8: Food Claims by Food Item",
+        ('bar', dict(x='Food_Name', y='TotalClaims', title="Most Claimed Food Items"))),
+    9: ("Successful Providers", "Query 9: Top Providers by Successful Claims",
+        ('bar', dict(x='ProviderName', y='SuccessfulClaims', title="Top Providers by Successful Claims"))),
+    10: ("Claim Status", "Query 10: Claim Status Distribution",
+         ('pie', dict(values='Percentage', names='Status', title="Claim Status Distribution"))),
+    11: ("Avg Claims", "Query 11: Average Quantity Claimed per Receiver",
+         ('bar', dict(x='Receiver_Name', y='Avg_Quantity_Claimed', title="Average Quantity Claimed per Receiver"))),
+    12: ("Meal Types", "Query 12: Most Claimed Meal Types",
+         ('pie', dict(values='Claim_Count', names='Meal_Type', title="Most Claimed Meal Types"))),
+    13: ("Donations", "Query 13: Total Quantity Donated by Each Provider",
+         ('bar', dict(x='Provider_Name', y='Total_Quantity_Donated', title="Total Quantity Donated by Providers"))),
+}
+
+def render_eda_result(n, result):
+    """Show an EDA query's result table and its configured chart"""
+    if result.empty:
+        return
+    if n == 5:
+        total_quantity = result.iloc[0]['Total_Quantity_Available']
+        st.metric("Total Food Available", f"{total_quantity:,} units")
+    show_result(result, f"query_{n}")
+    chart = EDA_TABS[n][2]
+    if chart:
+        kind, options = chart
+        fig = cached_figure(kind, result, **options)
+        st.plotly_chart(fig, width="stretch", theme=None)
 
-def show_eda_analysis(providers, receivers, food_listings, claims):
+def show_eda_analysis():
     """Display comprehensive EDA analysis from food.ipynb"""
     st.header("📊 EDA Analysis - Food Waste Management Insights")
     
-    # Create tabs for each EDA query
-    tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8, tab9, tab10, tab11, tab12, tab13 = st.tabs([
-        "City Distribution", "Top Provider Types", "Contact Info", "Top Receivers",
-        "Total Food Available", "Top Cities", "Food Types", "Food Claims",
-        "Successful Providers", "Claim Status", "Avg Claims", "Meal Types", "Donations"
-    ])
-    
-    with tab1:
-        st.subheader("Query 1: Food Providers and Receivers by City")
-        query1 = """
+    # The SQL-backed queries go to the server in a single batch
+    queries = {
+        # Only the busiest cities: thousands of bars would stall the chart
+        1: f"""
             SELECT 
                 City,
                 COUNT(DISTINCT Provider_ID) AS Total_Providers,
@@ -704,18 +1362,10 @@ def show_eda_analysis(providers, receivers, food_listings, claims):
                 SELECT City, NULL AS Provider_ID, Receiver_ID FROM Receivers
             ) AS combined
             GROUP BY City
-            ORDER BY City;
-        """
-        result1 = load_data(query1)
-        if not result1.empty:
-            st.dataframe(result1)
-            fig = px.bar(result1, x='City', y=['Total_Providers', 'Total_Receivers'], 
-                        title="Providers vs Receivers by City")
-            st.plotly_chart(fig)
-    
-    with tab2:
-        st.subheader("Query 2: Top Food Provider Types by Contribution")
-        query2 = """
+            ORDER BY COUNT(DISTINCT Provider_ID) + COUNT(DISTINCT Receiver_ID) DESC
+            OFFSET 0 ROWS FETCH NEXT {MAX_CHART_BARS} ROWS ONLY;
+        """,
+        2: """
             SELECT TOP 5
                 p.Type AS Provider_Type,
                 SUM(f.Quantity) AS Total_Quantity
@@ -724,41 +1374,8 @@ def show_eda_analysis(providers, receivers, food_listings, claims):
                 ON p.Provider_ID = f.Provider_ID
             GROUP BY p.Type
             ORDER BY Total_Quantity DESC;
-        """
-        result2 = load_data(query2)
-        if not result2.empty:
-            st.dataframe(result2)
-            fig = px.pie(result2, values='Total_Quantity', names='Provider_Type',
-                        title="Food Contribution by Provider Type")
-            st.plotly_chart(fig)
-    
-    with tab3:
-        st.subheader("Query 3: Contact Information of Food Providers")
-        city_name = st.text_input("Enter city name:", "Adambury")
-        query3 = f"""
-            SELECT 
-                Name,
-                Type,
-                Address,
-                City,
-                Contact
-            FROM Providers
-            WHERE City = '{city_name}'
-            ORDER BY Name;
-        """
-        result3 = load_data(query3)
-        if not result3.empty:
-            st.dataframe(result3)
-            st.download_button(
-                label="Download Contact Info",
-                data=result3.to_csv(index=False),
-                file_name=f"providers_{city_name}.csv",
-                mime="text/csv"
-            )
-    
-    with tab4:
-        st.subheader("Query 4: Top Receivers by Claims")
-        query4 = """
+        """,
+        4: """
             SELECT TOP 10
                 r.Receiver_ID,
                 r.Name AS Receiver_Name,
@@ -768,29 +1385,12 @@ def show_eda_analysis(providers, receivers, food_listings, claims):
                 ON c.Receiver_ID = r.Receiver_ID
             GROUP BY r.Receiver_ID, r.Name
             ORDER BY Total_Claims DESC;
-        """
-        result4 = load_data(query4)
-        if not result4.empty:
-            st.dataframe(result4)
-            fig = px.bar(result4, x='Receiver_Name', y='Total_Claims',
-                        title="Top Receivers by Number of Claims")
-            st.plotly_chart(fig)
-    
-    with tab5:
-        st.subheader("Query 5: Total Quantity of Food Available")
-        query5 = """
+        """,
+        5: """
             SELECT SUM(Quantity) AS Total_Quantity_Available
             FROM Food_Listings_Dataset;
-        """
-        result5 = load_data(query5)
-        if not result5.empty:
-            total_quantity = result5.iloc[0]['Total_Quantity_Available']
-            st.metric("Total Food Available", f"{total_quantity:,} units")
-            st.dataframe(result5)
-    
-    with tab6:
-        st.subheader("Query 6: Cities with Highest Food Listings")
-        query6 = """
+        """,
+        6: """
             SELECT TOP 10
                 p.City,
                 COUNT(f.Food_ID) AS Total_Listings
@@ -799,148 +1399,89 @@ def show_eda_analysis(providers, receivers, food_listings, claims):
                 ON f.Provider_ID = p.Provider_ID
             GROUP BY p.City
             ORDER BY Total_Listings DESC;
-        """
-        result6 = load_data(query6)
-        if not result6.empty:
-            st.dataframe(result6)
-            fig = px.bar(result6, x='City', y='Total_Listings',
-                        title="Top Cities by Food Listings")
-            st.plotly_chart(fig)
-    
-    with tab7:
-        st.subheader("Query 7: Most Common Food Types")
-        query7 = """
+        """,
+        7: """
             SELECT TOP 10
                 Food_Type,
                 COUNT(Food_ID) AS Listings_Count
             FROM Food_Listings_Dataset
             GROUP BY Food_Type
             ORDER BY Listings_Count DESC;
-        """
-        result7 = load_data(query7)
-        if not result7.empty:
-            st.dataframe(result7)
-            fig = px.pie(result7, values='Listings_Count', names='Food_Type',
-                        title="Distribution of Food Types")
-            st.plotly_chart(fig)
-    
-    with tab8:
-        st.subheader("Query 8: Food Claims by Food Item")
-        query8 = """
+        """,
+        8: """
+            WITH c AS (
+                SELECT Food_ID, COUNT(Claim_ID) AS Claim_Total
+                FROM Claims
+                GROUP BY Food_ID
+            )
             SELECT TOP 15
                 fl.Food_Name,
-                COUNT(c.Claim_ID) AS TotalClaims
+                SUM(COALESCE(c.Claim_Total, 0)) AS TotalClaims
             FROM Food_Listings_Dataset fl
-            LEFT JOIN Claims c ON fl.Food_ID = c.Food_ID
+            LEFT JOIN c ON fl.Food_ID = c.Food_ID
             GROUP BY fl.Food_Name
             ORDER BY TotalClaims DESC;
-        """
-        result8 = load_data(query8)
-        if not result8.empty:
-            st.dataframe(result8)
-            fig = px.bar(result8, x='Food_Name', y='TotalClaims',
-                        title="Most Claimed Food Items")
-            st.plotly_chart(fig)
-    
-    with tab9:
-        st.subheader("Query 9: Top Providers by Successful Claims")
-        query9 = """
-            SELECT TOP 10
-                p.Name AS ProviderName,
-                COUNT(c.Claim_ID) AS SuccessfulClaims
-            FROM Providers p
-            JOIN Food_Listings_Dataset fl ON p.Provider_ID = fl.Provider_ID
-            JOIN Claims c ON fl.Food_ID = c.Food_ID
-            WHERE c.Status = 'Completed'
-            GROUP BY p.Name
-            ORDER BY SuccessfulClaims DESC;
-        """
-        result9 = load_data(query9)
-        if not result9.empty:
-            st.dataframe(result9)
-            fig = px.bar(result9, x='ProviderName', y='SuccessfulClaims',
-                        title="Top Providers by Successful Claims")
-            st.plotly_chart(fig)
-    
-    with tab10:
-        st.subheader("Query 10: Claim Status Distribution")
-        query10 = """
-            SELECT 
-                Status,
-                COUNT(*) AS Count,
-                ROUND((COUNT(*) * 100.0 / (SELECT COUNT(*) FROM Claims)), 2) AS Percentage
-            FROM Claims
-            GROUP BY Status;
-        """
-        result10 = load_data(query10)
-        if not result10.empty:
-            st.dataframe(result10)
-            fig = px.pie(result10, values='Percentage', names='Status',
-                        title="Claim Status Distribution")
-            st.plotly_chart(fig)
-    
-    with tab11:
-        st.subheader("Query 11: Average Quantity Claimed per Receiver")
-        query11 = """
-            SELECT TOP 15
-                r.Receiver_ID,
-                r.Name AS Receiver_Name,
-                AVG(f.Quantity) AS Avg_Quantity_Claimed
-            FROM Claims c
-            JOIN Food_Listings_Dataset f
-                ON c.Food_ID = f.Food_ID
-            JOIN Receivers r
-                ON c.Receiver_ID = r.Receiver_ID
-            WHERE c.Status = 'Completed'
-            GROUP BY r.Receiver_ID, r.Name
-            ORDER BY Avg_Quantity_Claimed DESC;
-        """
-        result11 = load_data(query11)
-        if not result11.empty:
-            st.dataframe(result11)
-            fig = px.bar(result11, x='Receiver_Name', y='Avg_Quantity_Claimed',
-                        title="Average Quantity Claimed per Receiver")
-            st.plotly_chart(fig)
-    
-    with tab12:
-        st.subheader("Query 12: Most Claimed Meal Types")
-        query12 = """
-            SELECT 
-                f.Meal_Type,
-                COUNT(*) AS Claim_Count
-            FROM Claims c
-            JOIN Food_Listings_Dataset f
-                ON c.Food_ID = f.Food_ID
-            WHERE c.Status = 'Completed'
-            GROUP BY f.Meal_Type
-            ORDER BY Claim_Count DESC;
-        """
-        result12 = load_data(query12)
-        if not result12.empty:
-            st.dataframe(result12)
-            fig = px.pie(result12, values='Claim_Count', names='Meal_Type',
-                        title="Most Claimed Meal Types")
-            st.plotly_chart(fig)
-    
-    with tab13:
-        st.subheader("Query 13: Total Quantity Donated by Each Provider")
-        query13 = """
+        """,
+        13: """
+            WITH f AS (
+                SELECT Provider_ID, SUM(Quantity) AS Quantity
+                FROM Food_Listings_Dataset
+                GROUP BY Provider_ID
+            )
             SELECT TOP 15
                 p.Provider_ID,
                 p.Name AS Provider_Name,
                 SUM(f.Quantity) AS Total_Quantity_Donated
-            FROM Food_Listings_Dataset f
+            FROM f
             JOIN Providers p
                 ON f.Provider_ID = p.Provider_ID
             GROUP BY p.Provider_ID, p.Name
             ORDER BY Total_Quantity_Donated DESC;
+        """,
+    }
+    dtypes = {
+        1: {'Total_Providers': 'int32', 'Total_Receivers': 'int32'},
+        4: {'Total_Claims': 'int32'},
+        6: {'Total_Listings': 'int32'},
+        7: {'Listings_Count': 'int32'},
+        8: {'TotalClaims': 'int32'},
+    }
+    
+    # A radio instead of st.tabs: st.tabs runs every tab's body on each rerun,
+    # while this only loads and renders the query that is on screen
+    selected = st.radio("Query", list(EDA_TABS), format_func=lambda n: EDA_TABS[n][0],
+                        horizontal=True, label_visibility="collapsed")
+    st.subheader(EDA_TABS[selected][1])
+    
+    if selected == 3:
+        city_name = st.text_input("Enter city name:", "Adambury").strip()
+        # City is bound as a parameter: the text is never spliced into the SQL, and the
+        # query string stays identical so one cache entry and server plan serve every city
+        query3 = """
+            SELECT 
+                Name,
+                Type,
+                Address,
+                City,
+                Contact
+            FROM Providers
+            WHERE City = ?
+            ORDER BY Name;
         """
-        result13 = load_data(query13)
-        if not result13.empty:
-            st.dataframe(result13)
-            fig = px.bar(result13, x='Provider_Name', y='Total_Quantity_Donated',
-                        title="Total Quantity Donated by Providers")
-            st.plotly_chart(fig)
+        result3 = load_data_params(query3, (city_name,)) if city_name else pd.DataFrame()
+        if not result3.empty:
+            show_result(result3, "query_3")
+        return
+    
+    try:
+        if selected in (9, 10, 11, 12):
+            # Queries 9 to 12 are all over claims, derived from the same cached tables
+            results = load_claim_results()
+        else:
+            results = load_analytics_batch(queries, dtypes)
+    except QueryFailed:
+        return
+    render_eda_result(selected, results[selected])
 
 # Initialize session state
 if 'show_add_form' not in st.session_state:
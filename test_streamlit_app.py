@@ -0,0 +1,278 @@
+import os
+import sqlite3
+import time
+from queue import Queue
+
+import pandas as pd
+import pyarrow as pa
+import pytest
+
+try:
+    import duckdb
+except ImportError:
+    duckdb = None
+
+import streamlit_app as app
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+CSV_FILES = {
+    'Providers': 'providers_data.csv',
+    'Receivers': 'receivers_data.csv',
+    'Food_Listings_Dataset': 'food_listings_data.csv',
+    'Claims': 'claims_data.csv',
+}
+
+# Queries 9 to 12 as they ran on the server before load_claim_results replaced them.
+# SQL Server's AVG of an INT column is a truncated INT; DuckDB's is a float, so
+# query 11 spells the truncation out.
+ORIGINAL_QUERIES = {
+    9: """
+        SELECT TOP 10
+            p.Name AS ProviderName,
+            COUNT(c.Claim_ID) AS SuccessfulClaims
+        FROM Providers p
+        JOIN Food_Listings_Dataset fl ON p.Provider_ID = fl.Provider_ID
+        JOIN Claims c ON fl.Food_ID = c.Food_ID
+        WHERE c.Status = 'Completed'
+        GROUP BY p.Name
+        ORDER BY SuccessfulClaims DESC;
+    """,
+    10: """
+        SELECT
+            Status,
+            COUNT(*) AS Count,
+            ROUND((COUNT(*) * 100.0 / (SELECT COUNT(*) FROM Claims)), 2) AS Percentage
+        FROM Claims
+        GROUP BY Status;
+    """,
+    11: """
+        SELECT TOP 15
+            r.Receiver_ID,
+            r.Name AS Receiver_Name,
+            CAST(TRUNC(AVG(f.Quantity)) AS INTEGER) AS Avg_Quantity_Claimed
+        FROM Claims c
+        JOIN Food_Listings_Dataset f
+            ON c.Food_ID = f.Food_ID
+        JOIN Receivers r
+            ON c.Receiver_ID = r.Receiver_ID
+        WHERE c.Status = 'Completed'
+        GROUP BY r.Receiver_ID, r.Name
+        ORDER BY Avg_Quantity_Claimed DESC;
+    """,
+    12: """
+        SELECT
+            f.Meal_Type,
+            COUNT(*) AS Claim_Count
+        FROM Claims c
+        JOIN Food_Listings_Dataset f
+            ON c.Food_ID = f.Food_ID
+        WHERE c.Status = 'Completed'
+        GROUP BY f.Meal_Type
+        ORDER BY Claim_Count DESC;
+    """,
+}
+
+
+def clear_caches():
+    app.get_duckdb.clear()
+    app.load_claim_tables.clear()
+    app.load_claim_results.clear()
+
+
+@pytest.fixture
+def snapshots(tmp_path, monkeypatch):
+    """Parquet snapshots of the bundled CSVs, read through the DuckDB analytics engine"""
+    if duckdb is None:
+        pytest.skip("duckdb is not installed")
+    con = duckdb.connect()
+    for table, csv in CSV_FILES.items():
+        source = os.path.join(HERE, csv)
+        target = tmp_path / f"{table}.parquet"
+        con.execute(f"COPY (SELECT * FROM read_csv_auto('{source}')) TO '{target}' (FORMAT parquet)")
+    con.close()
+    monkeypatch.setattr(app, "ANALYTICS_ENGINE", "duckdb")
+    monkeypatch.setattr(app, "ANALYTICS_SNAPSHOT_DIR", str(tmp_path))
+    clear_caches()
+    yield app.get_duckdb()
+    clear_caches()
+
+
+def run_original(con, n, top=True):
+    query = ORIGINAL_QUERIES[n]
+    if not top:
+        query = query.replace("SELECT TOP 10", "SELECT").replace("SELECT TOP 15", "SELECT")
+    return con.execute(app.to_duckdb_sql(query)).df()
+
+
+class DeadConnection:
+    """A pooled connection whose server has gone away"""
+    closed = False
+
+    def __init__(self, error):
+        self.error = error
+
+    def cursor(self):
+        return self
+
+    def execute(self, *args):
+        raise self.error
+
+    def rollback(self):
+        raise self.error
+
+    def close(self):
+        self.closed = True
+
+
+# pandas 2.x re-raises any driver error from read_sql as DatabaseError; pandas 3 passes it through
+@pytest.fixture(params=[app.pyodbc.Error("08S01", "Communication link failure"),
+                        pd.errors.DatabaseError("Execution failed on sql 'SELECT 1': Communication link failure")],
+                ids=["driver-error", "pandas-error"])
+def dead_pool(request, monkeypatch):
+    """A one-slot pool holding a dead connection that was just returned"""
+    conn = DeadConnection(request.param)
+    pool = Queue(maxsize=1)
+    pool.put((conn, time.monotonic()))
+    monkeypatch.setattr(app, "get_pool", lambda: pool)
+    monkeypatch.setattr(app, "arrow_odbc", None)
+    return conn, pool
+
+
+def test_get_conn_drops_connection_failing_in_read_sql(dead_pool):
+    conn, pool = dead_pool
+    with pytest.raises(type(conn.error)):
+        app.run_query("SELECT 1")
+    assert conn.closed
+    # The slot comes back empty, so the next checkout reconnects
+    assert pool.get_nowait() is None
+
+
+class DroppedWriteConnection(DeadConnection):
+    """A connection whose link drops in the middle of a write"""
+
+    @property
+    def autocommit(self):
+        return False
+
+    @autocommit.setter
+    def autocommit(self, value):
+        # Opening the transaction works; the link is gone by the time it is reset
+        if value:
+            raise self.error
+
+
+def test_failed_write_on_dead_link_is_reported(monkeypatch):
+    conn = DroppedWriteConnection(app.pyodbc.Error("08S01", "Communication link failure"))
+    pool = Queue(maxsize=1)
+    pool.put((conn, time.monotonic()))
+    monkeypatch.setattr(app, "get_pool", lambda: pool)
+    errors = []
+    monkeypatch.setattr(app.st, "error", errors.append)
+
+    assert app.execute_query("Providers", "DELETE FROM Providers WHERE Provider_ID = ?", (1,)) is False
+    assert len(errors) == 1 and "Communication link failure" in errors[0]
+    assert conn.closed
+    assert pool.get_nowait() is None
+
+
+class PooledSqlite:
+    """An in-memory SQLite database standing in for a pooled pyodbc connection"""
+    closed = False
+
+    def __init__(self):
+        self.con = sqlite3.connect(":memory:")
+
+    def __getattr__(self, name):
+        return getattr(self.con, name)
+
+
+def test_chunked_read_keeps_types_of_all_null_chunks(monkeypatch):
+    conn = PooledSqlite()
+    conn.execute("CREATE TABLE Claims (Claim_ID INT, Status TEXT)")
+    conn.executemany("INSERT INTO Claims VALUES (?, ?)",
+                     [(None, "Pending"), (None, "Pending"), (1, None), (2, None), (3, "Completed")])
+    pool = Queue(maxsize=1)
+    pool.put((conn, time.monotonic()))
+    monkeypatch.setattr(app, "get_pool", lambda: pool)
+    monkeypatch.setattr(app, "arrow_odbc", None)
+
+    # The first chunk's Claim_IDs and the second chunk's Statuses are all NULL
+    result = app.run_query("SELECT Claim_ID, Status FROM Claims", chunksize=2)
+    assert result['Claim_ID'].dtype == pd.ArrowDtype(pa.int64())
+    assert result['Status'].dtype == pd.ArrowDtype(pa.string())
+    assert result['Claim_ID'].tolist()[2:] == [1, 2, 3]
+    assert result['Status'].isna().tolist() == [False, False, True, True, False]
+
+
+def test_to_duckdb_sql_moves_top_to_limit():
+    query = "SELECT TOP 5 Name, City FROM Providers ORDER BY Name;"
+    assert app.to_duckdb_sql(query) == "SELECT Name, City FROM Providers ORDER BY Name\nLIMIT 5;"
+
+
+def test_to_duckdb_sql_keeps_offset_fetch():
+    query = """
+        SELECT Food_Name, Quantity
+        FROM Food_Listings_Dataset
+        ORDER BY Quantity DESC
+        OFFSET 0 ROWS FETCH NEXT 5 ROWS ONLY;
+    """
+    assert app.to_duckdb_sql(query) == query
+
+
+def test_to_duckdb_sql_results_match_duckdb(snapshots):
+    top = snapshots.execute(app.to_duckdb_sql(
+        "SELECT TOP 5 Food_ID, Quantity FROM Food_Listings_Dataset ORDER BY Quantity DESC, Food_ID;")).df()
+    offset = snapshots.execute(app.to_duckdb_sql("""
+        SELECT Food_ID, Quantity FROM Food_Listings_Dataset ORDER BY Quantity DESC, Food_ID
+        OFFSET 0 ROWS FETCH NEXT 5 ROWS ONLY;
+    """)).df()
+    assert len(top) == 5
+    pd.testing.assert_frame_equal(top, offset)
+
+
+def test_claim_results_match_original_sql(snapshots):
+    results = app.load_claim_results()
+
+    # Query 9: the same top counts, and each provider's count as the full grouping gives it
+    expected9 = run_original(snapshots, 9)
+    all9 = run_original(snapshots, 9, top=False).set_index('ProviderName')['SuccessfulClaims']
+    result9 = results[9]
+    assert list(result9.columns) == ['ProviderName', 'SuccessfulClaims']
+    assert result9['SuccessfulClaims'].tolist() == expected9['SuccessfulClaims'].tolist()
+    for name, count in zip(result9['ProviderName'], result9['SuccessfulClaims']):
+        assert all9[name] == count
+
+    # Query 10: every status with its count and percentage
+    expected10 = run_original(snapshots, 10).sort_values('Status').reset_index(drop=True)
+    result10 = results[10].astype({'Status': str}).sort_values('Status').reset_index(drop=True)
+    assert result10['Status'].tolist() == expected10['Status'].tolist()
+    assert result10['Count'].tolist() == expected10['Count'].tolist()
+    assert result10['Percentage'].tolist() == pytest.approx(expected10['Percentage'].astype(float).tolist())
+
+    # Query 11: integer averages, truncated as the server's are
+    expected11 = run_original(snapshots, 11)
+    all11 = run_original(snapshots, 11, top=False).set_index('Receiver_ID')
+    result11 = results[11]
+    assert pd.api.types.is_integer_dtype(result11['Avg_Quantity_Claimed'])
+    assert result11['Avg_Quantity_Claimed'].tolist() == expected11['Avg_Quantity_Claimed'].tolist()
+    for receiver_id, name, average in result11[['Receiver_ID', 'Receiver_Name', 'Avg_Quantity_Claimed']].itertuples(index=False):
+        assert all11.loc[receiver_id, 'Receiver_Name'] == name
+        assert all11.loc[receiver_id, 'Avg_Quantity_Claimed'] == average
+
+    # Query 12: completed claims per meal type
+    expected12 = run_original(snapshots, 12).sort_values('Meal_Type').reset_index(drop=True)
+    result12 = results[12].astype({'Meal_Type': str}).sort_values('Meal_Type').reset_index(drop=True)
+    assert result12['Meal_Type'].tolist() == expected12['Meal_Type'].tolist()
+    assert result12['Claim_Count'].tolist() == expected12['Claim_Count'].tolist()
+
+
+def test_failed_claim_tables_are_not_cached(snapshots, monkeypatch):
+    run_analytics_batch = app.run_analytics_batch
+    # A failed query comes back as a frame without columns
+    monkeypatch.setattr(app, "run_analytics_batch", lambda queries: [pd.DataFrame() for _ in queries])
+    with pytest.raises(app.QueryFailed):
+        app.load_claim_results()
+
+    monkeypatch.setattr(app, "run_analytics_batch", run_analytics_batch)
+    assert not app.load_claim_results()[10].empty